@@ -5,9 +5,11 @@ import os
 import re
 import sys
 import json
+import mmap
 import time
 import datetime
 import hashlib
+import threading
 import base64
 import humanize
 import requests
@@ -17,7 +19,9 @@ from shutil import copyfile
 from appdirs import user_config_dir
 from dateutil import parser
 from collections import OrderedDict
-from curl_cffi import requests
+from curl_cffi import requests, CurlHttpVersion
+
+from .lib import json_loads, json_dumps
 
 
 class API:
@@ -241,7 +245,10 @@ class API:
 
         return (c_dt, m_dt, u_dt)
 
-    def check_sum(self, filename, blocksize=65536):
+    # The seed Degoo's checksums are hashed with (based on JS analysis)
+    CHECKSUM_SEED = bytes([13, 7, 2, 2, 15, 40, 75, 117, 13, 10, 19, 16, 29, 23, 3, 36])
+
+    def check_sum(self, filename, blocksize=1 << 20):
         '''
         When uploading files Degoo uses a 2 step process:
             1) Get Authorisation from the Degoo API - provides metadate needed for step 2
@@ -253,15 +260,42 @@ class API:
         appears to function. The SHA1 hash seems to use a hardcoded string as a seed (based on JS analysis)
 
         :param filename:    The name of the file (full path so it can be read)
-        :param blocksize:   Optionally a block size used for reading the file
+        :param blocksize:   Optionally a block size used for reading a file that can't be memory mapped
         '''
-        Seed = bytes([13, 7, 2, 2, 15, 40, 75, 117, 13, 10, 19, 16, 29, 23, 3, 36])
-        Hash = hashlib.sha1(Seed)
         with open(filename, "rb") as f:
-            for block in iter(lambda: f.read(blocksize), b""):
-                Hash.update(block)
+            try:
+                # Map the file and hash it with one update, in C, not a Python loop per block.
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return self.check_sum_buffer(mm)
+            except (ValueError, OSError):
+                # Empty files (and some special files) can't be mapped, so read them.
+                # Into one reusable buffer rather than allocating a new block per read.
+                Hash = hashlib.sha1(self.CHECKSUM_SEED)
+                buffer = bytearray(blocksize)
+                view = memoryview(buffer)
+                while size := f.readinto(buffer):
+                    Hash.update(view[:size])
+
+        return self._encode_check_sum(Hash.digest())
+
+    def check_sum_buffer(self, buffer):
+        '''
+        As check_sum, but for file contents already in memory (or memory mapped).
+
+        :param buffer:      A bytes-like object (bytes, memoryview, mmap ...) holding the whole file
+        '''
+        Hash = hashlib.sha1(self.CHECKSUM_SEED)
+        Hash.update(buffer)
+
+        return self._encode_check_sum(Hash.digest())
 
-        cs = list(bytearray(Hash.digest()))
+    def _encode_check_sum(self, digest):
+        '''
+        Dresses a SHA1 digest as the checksum Degoo expect (see check_sum).
+
+        :param digest:      The SHA1 digest of a file (as bytes)
+        '''
+        cs = list(bytearray(digest))
 
         # On one test file we now have:
         # [82, 130, 147, 14, 109, 84, 251, 153, 64, 39, 135, 7, 81, 9, 21, 80, 203, 120, 35, 150]
@@ -310,6 +344,26 @@ class API:
         else:
             return self.__devices__
 
+    __sessions__ = threading.local()
+
+    @property
+    def session(self):
+        '''
+        Returns a curl_cffi Session to make GraphQL calls with.
+
+        Successive calls on one Session reuse its keep-alive connection to Degoo
+        rather than making a new one (and a TLS handshake) every call. A Session
+        is not thread safe though, and so each thread gets its own.
+        '''
+        session = getattr(self.__sessions__, "session", None)
+
+        if session is None:
+            # HTTP/2 where Degoo offer it (falling back to HTTP/1.1), so the
+            # GraphQL calls needn't queue behind one another on the connection.
+            session = self.__sessions__.session = requests.Session(http_version=CurlHttpVersion.V2TLS)
+
+        return session
+
     ###########################################################################
     # # Login
 
@@ -440,7 +494,7 @@ class API:
                 print(f"\t\t{content}", file=sys.stderr)
 
             if response.ok:
-                rd = json.loads(response.text)
+                rd = json_loads(response.content)
 
                 # Degoo login returned a Token, but now it seems to return a RegfreshToken
                 # Requiring a second request for an API token! 
@@ -457,7 +511,7 @@ class API:
                         R = r.prepare()
                         response = s.send(R)
                         
-                    rd = json.loads(response.text)
+                    rd = json_loads(response.content)
                     if "AccessToken" in rd:
                         token = rd["AccessToken"]
                     else: 
@@ -515,10 +569,10 @@ class API:
 
         header = {"x-api-key": self.KEYS["x-api-key"]}
 
-        response = requests.post(self.URL, headers=header, data=json.dumps(request))
+        response = self.session.post(self.URL, headers=header, data=json_dumps(request))
 
         if response.ok:
-            rd = json.loads(response.text)
+            rd = json_loads(response.content)
 
             if "errors" in rd:
                 messages = []
@@ -565,10 +619,10 @@ class API:
 
         header = {"x-api-key": self.KEYS["x-api-key"]}
 
-        response = requests.post(self.URL, headers=header, data=json.dumps(request))
+        response = self.session.post(self.URL, headers=header, data=json_dumps(request))
 
         if response.ok:
-            rd = json.loads(response.text)
+            rd = json_loads(response.content)
 
             if "errors" in rd:
                 messages = []
@@ -653,10 +707,10 @@ class API:
 
         header = {"x-api-key": self.KEYS["x-api-key"]}
 
-        response = requests.post(self.URL, headers=header, data=json.dumps(request))
+        response = self.session.post(self.URL, headers=header, data=json_dumps(request))
 
         if response.ok:
-            rd = json.loads(response.text)
+            rd = json_loads(response.content)
 
             if 'errors' in rd:
                 messages = []
@@ -683,6 +737,11 @@ class API:
                         for i in items:
                             i["FilePath"] = f"{os.sep}{i['Name']}"
                             i["CategoryName"] = self.CATS.get(i['Category'], i['Category'])
+
+                        # The children of root are the devices. Note them now, so that resolving
+                        # a path down from root doesn't need a second fetch of root for self.devices.
+                        if self.__devices__ is None and not next_token:
+                            self.__devices__ = {int(i['DeviceID']): i['Name'] for i in items if i['CategoryName'] == "Device"}
                     else:
                         # Get the device names if we're not getting a root dir
                         # device_names calls back here (i.e. uses the getFileChildren5 API call)
@@ -768,10 +827,10 @@ class API:
 
         header = {"x-api-key": self.KEYS["x-api-key"]}
 
-        response = requests.post(self.URL, headers=header, data=json.dumps(request))
+        response = self.session.post(self.URL, headers=header, data=json_dumps(request))
 
         if response.ok:
-            rd = json.loads(response.text)
+            rd = json_loads(response.content)
 
             if "errors" in rd:
                 messages = []
@@ -785,7 +844,7 @@ class API:
                 for h in response.headers:
                     print(f"\t{h}: {response.headers[h]}", file=sys.stderr)
 
-                rd = json.loads(response.text)
+                rd = json_loads(response.content)
                 items = rd["data"]["getFilesFromPaths"]
                 return items
         else:
@@ -815,10 +874,10 @@ class API:
 
         header = {"x-api-key": self.KEYS["x-api-key"]}
 
-        response = requests.post(self.URL, headers=header, data=json.dumps(request))
+        response = self.session.post(self.URL, headers=header, data=json_dumps(request))
 
         if response.ok:
-            rd = json.loads(response.text)
+            rd = json_loads(response.content)
 
             if "errors" in rd:
                 messages = []
@@ -856,10 +915,10 @@ class API:
 
         header = {"x-api-key": self.KEYS["x-api-key"]}
 
-        response = requests.post(self.URL, headers=header, data=json.dumps(request))
+        response = self.session.post(self.URL, headers=header, data=json_dumps(request))
 
         if response.ok:
-            rd = json.loads(response.text)
+            rd = json_loads(response.content)
 
             if "errors" in rd:
                 messages = []
@@ -898,10 +957,10 @@ class API:
 
         header = {"x-api-key": self.KEYS["x-api-key"]}
 
-        response = requests.post(self.URL, headers=header, data=json.dumps(request))
+        response = self.session.post(self.URL, headers=header, data=json_dumps(request))
 
         if response.ok:
-            rd = json.loads(response.text)
+            rd = json_loads(response.content)
 
             if "errors" in rd:
                 messages = []
@@ -929,11 +988,19 @@ class API:
         points to the actual file data with a URL. setUploadFile3 does not return
         that URL, but getOverlay4 does.
 
-        :param name:        The name of the file
+        FileInfos is a list, and so a list of names can be given, to create many
+        items (in practice folders, which share the default size and checksum) in
+        the one call.
+
+        :param name:        The name of the file (or a list of names)
         :param parent_id:   The Degoo ID of the Folder it will be placed in
         :param size:        The files size
         :param checksum:    The files checksum (see self.check_sum)
+
+        :returns: The Degoo ID of the created item (or a list of them if a list of names was given)
         '''
+        names = name if isinstance(name, list) else [name]
+
         func = "setUploadFile3(Token: $Token, FileInfos: $FileInfos)"
         query = f"mutation SetUploadFile3($Token: String!, $FileInfos: [FileInfoUpload3]!) {{ {func} }}"
 
@@ -953,18 +1020,18 @@ class API:
                         "Token": self.KEYS["Token"],
                         "FileInfos": [{
                             "Checksum": checksum,
-                            "Name": name,
+                            "Name": n,
                             "CreationTime": int(1000 * time.time()),
                             "ParentID": parent_id,
                             "Size": size
-                        }]
+                        } for n in names]
                         },
                     "query": query
                    }
 
         header = {"x-api-key": self.KEYS["x-api-key"]}
 
-        response = requests.post(self.URL, headers=header, data=json.dumps(request))
+        response = self.session.post(self.URL, headers=header, data=json_dumps(request))
 
         if response.ok:
 #             print("Degoo Response Headers:", file=sys.stderr)
@@ -974,7 +1041,7 @@ class API:
 #             print(json.dumps(json.loads(response.content), indent=4), file=sys.stderr)
 #             print("", file=sys.stderr)
 
-            rd = json.loads(response.text)
+            rd = json_loads(response.content)
 
             if "errors" in rd:
                 messages = []
@@ -985,10 +1052,15 @@ class API:
             else:
                 contents = self.getAllFileChildren5(parent_id)
                 ids = {f["Name"]: int(f["ID"]) for f in contents}
-                if not name in ids:
-                    parent = self.getOverlay4(parent_id)
-                    print(f"WARNING: Failed to find {name} in {parent['FilePath']} after upload.", file=sys.stderr)
-                return ids[name]
+                for n in names:
+                    if not n in ids:
+                        parent = self.getOverlay4(parent_id)
+                        print(f"WARNING: Failed to find {n} in {parent['FilePath']} after upload.", file=sys.stderr)
+
+                if isinstance(name, list):
+                    return [ids.get(n, None) for n in names]
+                else:
+                    return ids[name]
 
         else:
             raise self.Error(f"setUploadFile3 failed with: {response}")
@@ -1018,10 +1090,10 @@ class API:
 
         header = {"x-api-key": self.KEYS["x-api-key"]}
 
-        response = requests.post(self.URL, headers=header, data=json.dumps(request))
+        response = self.session.post(self.URL, headers=header, data=json_dumps(request))
 
         if response.ok:
-            rd = json.loads(response.text)
+            rd = json_loads(response.content)
 
             if "errors" in rd:
                 messages = []
@@ -1060,7 +1132,7 @@ class API:
 
         header = {"x-api-key": self.KEYS["x-api-key"]}
 
-        response = requests.post(self.URL, headers=header, data=json.dumps(request))
+        response = self.session.post(self.URL, headers=header, data=json.dumps(request))
 
         if not response.ok:
             raise self.Error(f"getSchema failed with: {response.text}")
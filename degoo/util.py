@@ -4,24 +4,35 @@
 
 import os
 import sys
-import json
+import mmap
+import stat
 import wget
 import time
+import atexit
 import magic
 import base64
 import getpass
 import requests
+import threading
+import urllib3
 import humanfriendly
 
 from appdirs import user_config_dir
-from datetime import datetime
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dateutil.tz import tzutc, tzlocal
 
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
 # from clint.textui.progress import Bar as ProgressBar
 
 from .API import API
-from .lib import ddd, split_path, absolute_remote_path
+from .lib import ddd, split_path, absolute_remote_path, json_loads, json_dumps
+
+# The timezones, fetched once rather than every time we compare times
+_UTC = tzutc()
+_LOCAL = tzlocal()
 
 ###########################################################################
 # Get the path to user configuration diectory for this app
@@ -38,7 +49,7 @@ cwd_file = os.path.join(conf_dir, "cwd.json")
 
 if os.path.isfile(cwd_file):
     with open(cwd_file, "r") as file:
-        CWD = json.loads(file.read())
+        CWD = json_loads(file.read())
 else:
     CWD = ddd(0, "/")
 
@@ -64,15 +75,139 @@ sched_file = os.path.join(conf_dir, "schedule.json")
 
 if os.path.isfile(sched_file):
     with open(sched_file, "r") as file:
-        SCHEDULE = json.loads(file.read())
+        SCHEDULE = json_loads(file.read())
 else:
     with open(sched_file, "w") as file:
-        file.write(json.dumps(DEFAULT_SCHEDULE))
+        file.write(json_dumps(DEFAULT_SCHEDULE))
+
+
+def _seconds_since_midnight(t):
+    '''
+    Returns the time of day in a time.struct_time as seconds since midnight.
+
+    :param t: A time.struct_time
+    '''
+    return t.tm_hour * 3600 + t.tm_min * 60 + t.tm_sec
+
+
+# The windows, parsed by wait_for_window on first use (so that a malformed
+# schedule troubles only the transfers that respect it) and kept here, rather
+# than parsed again for every file transferred. As seconds since midnight, which
+# compare as times of day (struct_times don't, as they compare dates first and
+# strptime's are all in 1900).
+SCHEDULE_WINDOWS = {}
+
+###########################################################################
+# The number of files get_directory downloads at once. More is not always
+# better, as the server and the link saturate, so it's configurable with the
+# DEGOO_PARALLEL environment variable.
+
+DOWNLOAD_WORKERS = max(1, int(os.environ.get("DEGOO_PARALLEL", "8")))
+
+# The size of the chunks downloads are written to disk in
+DOWNLOAD_CHUNK = 1 << 20
+
+# The number of folders listed at once when fetching a whole tree of them
+COLLECT_WORKERS = 16
+
+# And the number of files put_directory uploads at once, likewise configurable
+# with the DEGOO_UPLOAD_PARALLEL environment variable (or put's --jobs option).
+UPLOAD_WORKERS = max(1, int(os.environ.get("DEGOO_UPLOAD_PARALLEL", "4")))
+
+# The size of the blocks uploads are read from disk and sent to the server in.
+# Left to themselves files are read in 8 KiB blocks and bodies sent in 16 KiB
+# ones, which is a lot of reads and TLS records for a big file.
+UPLOAD_BLOCK = 1 << 20
+
+# The number of times an upload is attempted if its connection drops
+UPLOAD_ATTEMPTS = 3
+
+
+class TransferAdapter(HTTPAdapter):
+    '''
+    An HTTPAdapter that sends request bodies in UPLOAD_BLOCK sized blocks.
+
+    Only urllib3 2 and later let a connection pool set that, earlier versions
+    send in their default block size.
+    '''
+
+    def init_poolmanager(self, *args, **kwargs):
+        if int(urllib3.__version__.split(".")[0]) >= 2:
+            kwargs.setdefault("blocksize", UPLOAD_BLOCK)
+        super().init_poolmanager(*args, **kwargs)
+
+# A requests session for downloads and uploads, its connection pool lets
+# successive transfers reuse connections to the server (sized to suit
+# DOWNLOAD_WORKERS and UPLOAD_WORKERS). Failed connections and gateway errors are retried a few
+# times, though only connections are retried for uploads (POSTs), as their
+# body has been read by then and can't be sent again.
+session = requests.Session()
+session.mount("https://", TransferAdapter(pool_connections=16, pool_maxsize=max(16, DOWNLOAD_WORKERS, UPLOAD_WORKERS),
+                                          max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])))
+
+###########################################################################
+# Load the record of past uploads, if available.
+#
+# Maps a local file (and the Degoo folder it was uploaded to) to the
+# modification time, size and checksum the file had when uploaded. This
+# lets has_changed() answer from a local stat() alone for files that have
+# not been touched since, without asking Degoo.
+
+uploads_file = os.path.join(conf_dir, "uploads.json")
+
+UPLOADS = {}
+
+if os.path.isfile(uploads_file):
+    try:
+        with open(uploads_file, "r") as file:
+            UPLOADS = json_loads(file.read())
+
+    # A damaged record is no loss, files will just be checked against Degoo again
+    except ValueError:
+        pass
+
+__UPLOADS_CHANGED__ = False
+
+
+def upload_key(local_filename, dir_id):
+    '''
+    The key under which an upload of local_filename to dir_id is recorded in UPLOADS.
+
+    :param local_filename: The local filename (full or relative path)
+    :param dir_id:         The Degoo ID of the folder it is uploaded to
+    '''
+    return f"{dir_id}:{os.path.abspath(local_filename)}"
+
+
+def record_upload(local_filename, dir_id, local_stat, checksum):
+    '''
+    Records an upload in UPLOADS so that has_changed() can recognise it later.
+
+    :param local_filename: The local filename (full or relative path)
+    :param dir_id:         The Degoo ID of the folder it was uploaded to
+    :param local_stat:     The os.stat_result of local_filename when uploaded
+    :param checksum:       The Degoo checksum of local_filename when uploaded
+    '''
+    global __UPLOADS_CHANGED__
+    UPLOADS[upload_key(local_filename, dir_id)] = [local_stat.st_mtime_ns, local_stat.st_size, checksum]
+    __UPLOADS_CHANGED__ = True
+
+
+@atexit.register
+def _save_uploads():
+    if __UPLOADS_CHANGED__:
+        # Write it atomically so an interrupted save never leaves half a record
+        with open(uploads_file + ".tmp", "w") as file:
+            file.write(json_dumps(UPLOADS))
+        os.replace(uploads_file + ".tmp", uploads_file)
 
 ###########################################################################
 # Instantiate an API
 api = API()
 
+# The categories that are folders, as a set to test membership of quickly
+FOLDER_TYPES = frozenset(api.folder_types)
+
 ###########################################################################
 # An Error class for Degoo functions to raise if need be
 
@@ -99,6 +234,52 @@ __CACHE_ITEMS__ = {0: {
 # A cache of directory contents
 __CACHE_CONTENTS__ = {}
 
+# A cache of indexes into directory contents, keyed on directory ID, holding
+# the contents list it was built from and the index (see children_index()).
+__CACHE_CHILDREN_INDEX__ = {}
+
+# The same cached items indexed by FilePath, so get_item can look up a path
+# without scanning the whole cache. Kept in step with __CACHE_ITEMS__ by
+# cache_item() and decache().
+__CACHE_BY_PATH__ = {__CACHE_ITEMS__[0]["FilePath"]: __CACHE_ITEMS__[0]}
+
+# And indexed by (ParentID, Name), so get_item can step down a path one
+# folder at a time without searching the folder's contents.
+__CACHE_BY_PARENT_NAME__ = {}
+
+
+def cache_item(degoo_id, item):
+    '''
+    Adds an item to the cache store (replacing any item already cached with that ID).
+
+    :param degoo_id: The ID of a degoo item/object
+    :param item:     The property dictionary of that item
+    '''
+    old = __CACHE_ITEMS__.get(degoo_id, None)
+    if old:
+        unindex_item(old)
+
+    __CACHE_ITEMS__[degoo_id] = item
+    if "FilePath" in item:
+        __CACHE_BY_PATH__[item["FilePath"]] = item
+    if "Name" in item and "ParentID" in item:
+        __CACHE_BY_PARENT_NAME__[(item["ParentID"], item["Name"])] = item
+
+
+def unindex_item(item):
+    '''
+    Removes an item from the cache indexes (if they still point at it).
+
+    :param item: The property dictionary of a cached item
+    '''
+    path = item.get("FilePath", None)
+    if __CACHE_BY_PATH__.get(path, None) is item:
+        __CACHE_BY_PATH__.pop(path)
+
+    parent_name = (item.get("ParentID", None), item.get("Name", None))
+    if __CACHE_BY_PARENT_NAME__.get(parent_name, None) is item:
+        __CACHE_BY_PARENT_NAME__.pop(parent_name)
+
 
 def decache(degoo_id):
     '''
@@ -107,8 +288,99 @@ def decache(degoo_id):
 
     :param degoo_id: The ID of a degoo item/object
     '''
-    __CACHE_ITEMS__.pop(degoo_id, None)
+    item = __CACHE_ITEMS__.pop(degoo_id, None)
+    if item:
+        unindex_item(item)
+
+        # The contents of its parent folder include it and are stale too
+        __CACHE_CONTENTS__.pop(item.get("ParentID", None), None)
+
+        # As is anything cached below a folder, all found in one pass
+        if item.get("CategoryName", None) in FOLDER_TYPES:
+            prefix = os.path.join(item["FilePath"], "")
+            below = [i for i, props in __CACHE_ITEMS__.items() if props.get("FilePath", "").startswith(prefix)]
+            for i in below:
+                unindex_item(__CACHE_ITEMS__.pop(i))
+                __CACHE_CONTENTS__.pop(i, None)
+                __CACHE_CHILDREN_INDEX__.pop(i, None)
+
     __CACHE_CONTENTS__.pop(degoo_id, None)
+    __CACHE_CHILDREN_INDEX__.pop(degoo_id, None)
+
+
+###########################################################################
+# The cache is saved on exit and loaded again by the next command run
+# within CACHE_TTL seconds, so that successive commands needn't fetch the
+# same items and folders from Degoo again. It's configurable with the
+# DEGOO_CACHE_TTL environment variable, set it to 0 to disable the cache.
+#
+# Commands don't coordinate their caches though. One still running when
+# another removes or moves an item (in another shell, or on another device)
+# saves its own, older, view of that item on exit. The next commands run
+# within CACHE_TTL may then find the item where it was. Disable the cache
+# if you run commands like that.
+
+CACHE_TTL = int(os.environ.get("DEGOO_CACHE_TTL", "600"))
+
+cache_file = os.path.join(conf_dir, "cache.json")
+
+# When the cached items were first fetched from Degoo. A loaded cache keeps
+# the time it was first saved with, so that it expires CACHE_TTL seconds after
+# that however often it is saved again. Items fetched since are saved with it
+# too, and so expire early, but never late.
+__CACHE_TS__ = time.time()
+
+if CACHE_TTL and os.path.isfile(cache_file):
+    try:
+        with open(cache_file, "r") as file:
+            cache = json_loads(file.read())
+
+        if time.time() - cache["ts"] < CACHE_TTL:
+            __CACHE_TS__ = cache["ts"]
+
+            for degoo_id, item in cache["items"].items():
+                cache_item(int(degoo_id), item)
+
+            for dir_id, child_ids in cache["contents"].items():
+                if all(child_id in __CACHE_ITEMS__ for child_id in child_ids):
+                    __CACHE_CONTENTS__[int(dir_id)] = [__CACHE_ITEMS__[child_id] for child_id in child_ids]
+
+    # A damaged cache is no loss, we'll just fetch from Degoo again
+    except (ValueError, KeyError, AttributeError, TypeError):
+        pass
+
+
+@atexit.register
+def _save_cache():
+    if CACHE_TTL:
+        # Contents are saved as lists of IDs into the saved items (to save them only once)
+        cache = {"items": {degoo_id: item for degoo_id, item in __CACHE_ITEMS__.items() if degoo_id},
+                 "contents": {dir_id: [child["ID"] for child in children] for dir_id, children in __CACHE_CONTENTS__.items()},
+                 "ts": __CACHE_TS__}
+
+        # Write it atomically so a concurrent command never reads half a cache
+        with open(cache_file + ".tmp", "w") as file:
+            file.write(json_dumps(cache))
+        os.replace(cache_file + ".tmp", cache_file)
+
+
+def clear_cache():
+    '''
+    Forgets all cached items and folder contents, and the saved cache.
+
+    Used on login, as what's cached may be another account's.
+    '''
+    global __CACHE_TS__
+
+    for degoo_id in [degoo_id for degoo_id in __CACHE_ITEMS__ if degoo_id]:
+        unindex_item(__CACHE_ITEMS__.pop(degoo_id))
+
+    __CACHE_CONTENTS__.clear()
+    __CACHE_CHILDREN_INDEX__.clear()
+    __CACHE_TS__ = time.time()
+
+    if os.path.isfile(cache_file):
+        os.remove(cache_file)
 
 ###########################################################################
 # Scheduling functions
@@ -116,34 +388,51 @@ def decache(degoo_id):
 
 def wait_until_next(time_of_day, verbose=0):
     '''
-    Wait until the specified time. Uses Python sleep() which uses no CPU as rule
-    and works on a basis liek Zeno's dichotomy paradox, by sleeping to the half
-    way point in successive trials unil we're with 0.1 second of the target.
+    Wait until the specified time. Uses Python sleep() which uses no CPU as rule,
+    sleeping once for the whole wait (and again only if woken early).
 
     Used herein for scheduling uploads and downloads.
 
-    :param time_of_day: A time of day as time.time_struct.
+    :param time_of_day: A time of day as seconds since midnight.
     '''
-    now = time.localtime()
-    if now < time_of_day:
-        today = datetime.datetime.now().date()
-        until = datetime.datetime.combine(today, datetime.datetime.fromtimestamp(time.mktime(time_of_day)).time())
-    else:
-        tomorrow = datetime.datetime.now().date() + datetime.timedelta(days=1)
-        until = datetime.datetime.combine(tomorrow, datetime.datetime.fromtimestamp(time.mktime(time_of_day)).time())
+    now = datetime.now()
+    until = datetime.combine(now.date(), datetime.min.time()) + timedelta(seconds=time_of_day)
+    if until <= now:
+        until += timedelta(days=1)
 
     if verbose > 0:
         print(f"Waiting until {until.strftime('%A, %d/%m/%Y %H:%M:%S')}")
 
-    while True:
-        diff = (until - datetime.datetime.now()).total_seconds()
-        if diff < 0: return  # In case end_datetime was in past to begin with
+    diff = (until - datetime.now()).total_seconds()
 
+    # Loop only in case we're woken early
+    while diff > 0:
         if verbose > 1:
-            print(f"Waiting for {humanfriendly.format_timespan(diff/2)} seconds")
+            print(f"Waiting for {humanfriendly.format_timespan(diff)}")
+
+        time.sleep(diff)
+        diff = (until - datetime.now()).total_seconds()
+
+
+def wait_for_window(direction, verbose=0):
+    '''
+    If we're outside the scheduled window for uploads or downloads, wait until it opens.
+
+    :param direction: "upload" or "download" (a key into SCHEDULE)
+    '''
+    if not direction in SCHEDULE_WINDOWS:
+        window = SCHEDULE[direction]
+        SCHEDULE_WINDOWS[direction] = (_seconds_since_midnight(time.strptime(window[0], "%H:%M:%S")),
+                                       _seconds_since_midnight(time.strptime(window[1], "%H:%M:%S")))
+
+    window_start, window_end = SCHEDULE_WINDOWS[direction]
+    now = _seconds_since_midnight(time.localtime())
 
-        time.sleep(diff / 2)
-        if diff <= 0.1: return
+    in_window = now > min(window_start, window_end) and now < max(window_start, window_end)
+
+    if ((window_start < window_end and not in_window)
+    or  (window_start > window_end and in_window)):
+        wait_until_next(window_start, verbose)
 
 ###########################################################################
 # Command functions - these are entry points for the CLI tools
@@ -158,8 +447,13 @@ def login(username=None, password=None, verbose=0, redacted=False):
     if password is None:
         password = getpass.getpass()
 
-    return api.login(username, password, verbose, redacted)
-    # return api.register(username, password, verbose, redacted)
+    success = api.login(username, password, verbose, redacted)
+    # success = api.register(username, password, verbose, redacted)
+
+    if success:
+        clear_cache()
+
+    return success
 
 
 def userinfo():
@@ -199,28 +493,56 @@ def mkdir(name, parent_id=None, verbose=0, dry_run=False):
     :param name: The name of a directory/folder to make in the CWD or nominated (by id) parent
     :param parent_id: Optionally a the degoo ID of a parent. If not specified the CWD is used.
     '''
+    return mkdirs([name], parent_id, verbose, dry_run)[name]
+
+
+def mkdirs(names, parent_id=None, verbose=0, dry_run=False):
+    '''
+    Makes a number of Degoo directories/folders in the one parent, asking Degoo
+    to make all those that don't already exist in one call.
+
+    :param names: A list of names of directories/folders to make in the CWD or nominated (by id) parent
+    :param parent_id: Optionally a the degoo ID of a parent. If not specified the CWD is used.
+
+    :returns: A dictionary of the Degoo IDs of the directories keyed on name (None for any a dry run didn't make)
+    '''
     if parent_id == None and "Path" in CWD:
         parent_id = get_item(CWD["Path"]).get("ID", None)
 
     if parent_id:
         contents = get_children(parent_id)
-        existing_names = [f["Name"] for f in contents]
         ids = {f["Name"]: int(f["ID"]) for f in contents}
-        if name in existing_names:
-            if verbose > 0:
-                print(f"{name} already exists")
-            return ids[name]
-        else:
+
+        new = []
+        for name in names:
+            if name in ids:
+                if verbose > 0:
+                    print(f"{name} already exists")
+            elif not name in new:
+                new.append(name)
+
+        if new:
             if not dry_run:
-                ID = api.setUploadFile3(name, parent_id)
+                created = api.setUploadFile3(new, parent_id)
+
+                # The parent's cached contents lack the new directories
+                __CACHE_CONTENTS__.pop(parent_id, None)
+
+                # Any missing from the listing afterwards weren't made, and
+                # a None ID would stand for the CWD to whoever uses it.
+                missing = [name for name, ID in zip(new, created) if ID is None]
+                if missing:
+                    raise DegooError(f"mkdir: Failed to create {', '.join(missing)} in {path_str(parent_id)}")
             else:
-                # Dry run, no ID created
-                ID = None
+                # Dry run, no IDs created
+                created = [None] * len(new)
 
-            if verbose > 0:
-                print(f"Created directory {name} with ID {ID}")
+            for name, ID in zip(new, created):
+                ids[name] = ID
+                if verbose > 0:
+                    print(f"Created directory {name} with ID {ID}")
 
-            return ID
+        return {name: ids[name] for name in names}
     else:
         raise DegooError("mkdir: No parent_id provided.")
 
@@ -239,8 +561,26 @@ def mv(source, target):
     source_folder, source_name = os.path.split(source)
     target_folder, target_name = os.path.split(target)
 
+    # Find the folders source and target share first, so that the walks down to
+    # each don't both fetch them. Only if they then part ways below there, into
+    # different folders, are the walks worth running concurrently. The other
+    # paths we look at below are in the same folders as these and so will then
+    # be found in the cache.
+    abs_source = absolute_remote_path(CWD, source)
+    abs_target = absolute_remote_path(CWD, target)
+    common = os.path.commonpath((abs_source, abs_target))
+    common_id = path_id(common)
+
+    if common_id is not None and not common in (os.path.dirname(abs_source), os.path.dirname(abs_target)):
+        get_children(common_id)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            source_id, target_id = executor.map(path_id, (source, target))
+    else:
+        source_id = path_id(source)
+        target_id = path_id(target)
+
     # If target is a folder move the source into the target folder with same name
-    if exists(target):
+    if target_id is not None:
         if is_folder(target):
             target_folder = target
             target_name = source_name
@@ -258,13 +598,9 @@ def mv(source, target):
     if source_folder == target_folder and (not source_name or not target_name):
         raise DegooError(f"mv: Cannot move {source} to {target}")
 
-    source_id = path_id(source)
-
     if not source_id:
         raise DegooError(f"mv: '{source}' does not exist on the Degoo drive")
 
-    target_id = path_id(target)
-
     if target_id:
         # It had better be folder or we can do the move
         if not is_folder(target):
@@ -324,6 +660,9 @@ def mv(source, target):
     # Remove it from cache as the cached FilePath is now wrong for this object
     decache(source_id)
 
+    # And the folder it moved into now has it among its contents
+    __CACHE_CONTENTS__.pop(target_id, None)
+
     return source_id
 
 
@@ -342,9 +681,13 @@ def rm(file):
     if not file_id:
         raise DegooError(f"rm: Illegal file: {file}")
 
-    path = api.getOverlay4(file_id)["FilePath"]
+    # path_id just looked it up, so its path is cached
+    path = get_item(file_id)["FilePath"]
     api.setDeleteFile5(file_id)  # @UnusedVariable
 
+    # Remove it from cache as it's no longer at that FilePath
+    decache(file_id)
+
     return path
 
 
@@ -356,7 +699,7 @@ def cd(path):
     '''
     CWD = get_dir(path)
     with open(cwd_file, "w") as file:
-        file.write(json.dumps(CWD))
+        file.write(json_dumps(CWD))
     return CWD
 
 
@@ -488,26 +831,36 @@ def is_folder(path):
     :param path: An int or str or None (for the current working directory)
     '''
     try:
-        return get_item(path)["CategoryName"] in api.folder_types
+        return get_item(path)["CategoryName"] in FOLDER_TYPES
     except:
         return False
 
 
-def get_item(path=None, verbose=0, recursive=False):
+def get_props(degoo_id):
     '''
-    Return the property dictionary representing a nominated Degoo item.
+    Return the property dictionary of a Degoo item, from the cache if it's there,
+    else from Degoo (caching it).
 
-    :param path: An int or str or None (for the current working directory)
+    The root is special, it returns no properties from the degoo API. We dummy
+    some up for internal use (see __CACHE_ITEMS__).
+
+    :param degoo_id: The Degoo ID of an item
     '''
+    item = __CACHE_ITEMS__.get(degoo_id, None)
+
+    if item is None:
+        item = api.getOverlay4(degoo_id)
+        cache_item(degoo_id, item)
 
-    def props(degoo_id):
-        # The root is special, it returns no properties from the degoo API
-        # We dummy some up for internal use:
-        if degoo_id not in __CACHE_ITEMS__:
-            __CACHE_ITEMS__[degoo_id] = api.getOverlay4(degoo_id)
+    return item
 
-        return __CACHE_ITEMS__[degoo_id]
 
+def get_item(path=None, verbose=0, recursive=False):
+    '''
+    Return the property dictionary representing a nominated Degoo item.
+
+    :param path: An int or str or dict (of properties) or None (for the current working directory)
+    '''
     if path is None:
         if CWD:
             path = CWD["ID"]  # Current working directory if it exists
@@ -516,57 +869,82 @@ def get_item(path=None, verbose=0, recursive=False):
     elif isinstance(path, str):
         abs_path = absolute_remote_path(CWD, path)
 
-        paths = {item["FilePath"]: item for _, item in __CACHE_ITEMS__.items()}  # @ReservedAssignment
+        cached = __CACHE_BY_PATH__.get(abs_path, None)
 
-        if not recursive and abs_path in paths:
-            return paths[abs_path]
+        if cached and not recursive:
+            return cached
+        elif cached:
+            # A recursive listing still needs only the ID from the cache, not a walk
+            return get_item(cached["ID"], verbose, recursive)
         else:
-            parts = split_path(abs_path)  # has no ".." parts thanks to absolute_remote_path
-
-            if parts[0] == os.sep:
-                part_id = 0
-                parts.pop(0)
-            else:
-                part_id = CWD["ID"]
-
-            for p in parts:
-                if verbose > 1:
-                    print(f"get_item: getting children of {part_id} hoping for find {p}")
-
-                contents = get_children(part_id)
-                ids = {f["Name"]: int(f["ID"]) for f in contents}
-                if p in ids:
-                    part_id = ids[p]
+            # Step back to the longest cached prefix of the path, and walk
+            # down from there (not from the root) to find the item.
+            head, parts = abs_path, []
+            while not head in __CACHE_BY_PATH__:
+                head, tail = os.path.split(head)
+                # At the root, which split no longer shortens (be it os.sep, or
+                # the // that normpath keeps at the start of a path on POSIX)
+                if not tail:
+                    break
+                parts.append(tail)
+
+            part_id = int(__CACHE_BY_PATH__[head]["ID"]) if head in __CACHE_BY_PATH__ else 0
+
+            for p in reversed(parts):
+                child = __CACHE_BY_PARENT_NAME__.get((part_id, p), None)
+
+                if child is None:
+                    if verbose > 1:
+                        print(f"get_item: getting children of {part_id} hoping for find {p}")
+
+                    # Fetching the children indexes them, so look again rather than building a dict of them
+                    get_children(part_id)
+                    child = __CACHE_BY_PARENT_NAME__.get((part_id, p), None)
+
+                if child:
+                    part_id = int(child["ID"])
                 else:
                     raise DegooError(f"{p} does not exist in {path_str(part_id)}")
 
             # Now we have the item ID we can call back with an int part_id.
             return get_item(part_id, verbose, recursive)
 
-    # If recursing we pass in a prop dictionary
-    elif recursive and isinstance(path, dict):
-        path = path.get("ID", 0)
+    # A prop dictionary we already have needs no lookup, unless recursing
+    elif isinstance(path, dict):
+        if recursive:
+            path = path.get("ID", 0)
+        else:
+            return path
 
     if isinstance(path, int):
-        item = props(path)
+        item = get_props(path)
 
         if recursive:
+            # One dict is filled as we descend, rather than one per folder merged on the way back up.
             items = {item["FilePath"]: item}
 
-            if item["CategoryName"] in api.folder_types:
-                if verbose > 1:
-                    print(f"Recursive get_item descends to {item['FilePath']}")
+            if item["CategoryName"] in FOLDER_TYPES:
+                # A stack of iterators over children keeps the items in depth first order
+                stack = [iter((item,))]
+                while stack:
+                    child = next(stack[-1], None)
 
-                children = get_children(item)
+                    if child is None:
+                        stack.pop()
+                        continue
 
-                if verbose > 1:
-                    print(f"\tand finds {len(children)} children.")
+                    items[child["FilePath"]] = child
 
-                for child in children:
-                    if child["CategoryName"] in api.folder_types:
-                        items.update(get_item(child, verbose, recursive))
-                    else:
-                        items[child["FilePath"]] = child
+                    if child["CategoryName"] in FOLDER_TYPES:
+                        if verbose > 1:
+                            print(f"Recursive get_item descends to {child['FilePath']}")
+
+                        children = get_children(child)
+
+                        if verbose > 1:
+                            print(f"\tand finds {len(children)} children.")
+
+                        stack.append(iter(children))
             elif verbose > 1:
                 print(f"Recursive get_item stops at {item['FilePath']}. Category: {item['CategoryName']}")
 
@@ -606,49 +984,122 @@ def get_children(directory=None):
         # Having the props of all children we cache those too
         # Can overwrite existing cache as this fetch is more current anyhow
         for item in __CACHE_CONTENTS__[dir_id]:
-            __CACHE_ITEMS__[item["ID"]] = item
+            cache_item(item["ID"], item)
 
     return __CACHE_CONTENTS__[dir_id]
 
 
-def has_changed(local_filename, remote_path, verbose=0):
+def upload_time(LastUploadTime):
+    '''
+    Returns a Degoo LastUploadTime (milliseconds since the epoch, UTC) as a local datetime.
+
+    :param LastUploadTime: The LastUploadTime of a Degoo item, as an int or str
+    '''
+    return datetime.utcfromtimestamp(int(LastUploadTime) / 1000).replace(tzinfo=_UTC).astimezone(_LOCAL)
+
+
+def children_index(dir_id):
+    '''
+    Returns a dictionary keyed on Name of the (Size, LastUploadTime) of each child
+    of a Degoo folder, as an int and a local datetime respectively.
+
+    Built once per fetch of the folder's contents and cached, so that checking many
+    files against the one folder (as put_directory does) doesn't rebuild it each time.
+
+    :param dir_id: The Degoo ID of a Folder item
+    '''
+    children = get_children(dir_id)
+
+    # The index is stale if the contents have been refetched (or decached) since it was built
+    cached = __CACHE_CHILDREN_INDEX__.get(dir_id, None)
+    if cached and cached[0] is children:
+        return cached[1]
+
+    index = {f["Name"]: (int(f["Size"]), upload_time(f["LastUploadTime"])) for f in children}
+    __CACHE_CHILDREN_INDEX__[dir_id] = (children, index)
+
+    return index
+
+
+def _collect(dir_id):
+    '''
+    Fetches the children of a Degoo folder, and of every folder below it.
+
+    Breadth first, listing all the folders at each depth concurrently, so that
+    the round trips for sibling folders overlap rather than wait on each other.
+
+    :param dir_id: The Degoo ID of a Folder item
+
+    :returns: A dictionary keyed on the Degoo ID of each folder, of its list of children.
+    '''
+    collected = {}
+    frontier = [dir_id]
+
+    with ThreadPoolExecutor(max_workers=COLLECT_WORKERS) as executor:
+        while frontier:
+            listings = list(executor.map(get_children, frontier))
+            collected.update(zip(frontier, listings))
+            frontier = [child["ID"] for children in listings for child in children if child["CategoryName"] in FOLDER_TYPES]
+
+    return collected
+
+
+def has_changed(local_filename, remote_path, verbose=0, local_stat=None):
     '''
     Determines if a local local_filename has changed since last upload.
 
     :param local_filename: The local local_filename ((full or relative remote_path)
     :param remote_path:    The Degoo path it was uploaded to (can be a Folder or a File, either relative or abolute remote_path)
     :param verbose:        Print useful tracking/diagnostic information
+    :param local_stat:     Optionally the os.stat_result for local_filename if the caller has one already
 
-    :returns: True if local local_filename has chnaged since last upload, false if not.
+    :returns: A tuple of True if local local_filename has chnaged since last upload, false if not,
+              and the property dictionary of the remote file (None if it's not there, or not to hand).
     '''
-    # We need the local local_filename name, size and last modification time
+    if local_stat is None:
+        local_stat = os.stat(local_filename)
+
+    remote_id = path_id(remote_path)
     Name = os.path.basename(local_filename)
-    Size = os.path.getsize(local_filename)
-    LastModificationTime = datetime.fromtimestamp(os.path.getmtime(local_filename)).astimezone(tzlocal())
+
+    # If we uploaded it to there and it's not been touched since, we needn't compare
+    # it with the remote file, so long as that's still there as we uploaded it (it
+    # may have been removed since). The folder's listing is fetched only once for
+    # all the files checked against it.
+    uploaded = UPLOADS.get(upload_key(local_filename, remote_id), None)
+    if uploaded and uploaded[:2] == [local_stat.st_mtime_ns, local_stat.st_size]:
+        remote = children_index(remote_id).get(Name, None)
+        if remote and remote[0] == uploaded[1]:
+            if verbose > 0:
+                print(f"{local_filename}: unchanged since last upload")
+            return (False, __CACHE_BY_PARENT_NAME__.get((remote_id, Name), None))
+
+    # We need the local local_filename name, size and last modification time
+    Size = local_stat.st_size
+    LastModificationTime = datetime.fromtimestamp(local_stat.st_mtime).astimezone(_LOCAL)
 
     # Get the files' properties either from the folder it's in or the file itself
     # Depending on what was specified in remote_path (the containing folder or the file)
-    if is_folder(remote_path):
-        files = get_children(remote_path)
-
-        sizes = {f["Name"]: int(f["Size"]) for f in files}
-        times = {f["Name"]: int(f["LastUploadTime"]) for f in files}
+    if remote_id is not None and is_folder(remote_id):
+        index = children_index(remote_id)
 
-        if Name in sizes:
-            Remote_Size = sizes[Name]
-            LastUploadTime = datetime.utcfromtimestamp(int(times[Name]) / 1000).replace(tzinfo=tzutc()).astimezone(tzlocal())
+        if Name in index:
+            Remote_Size, LastUploadTime = index[Name]
         else:
             Remote_Size = 0
-            LastUploadTime = datetime.utcfromtimestamp(0).replace(tzinfo=tzutc()).astimezone(tzlocal())
+            LastUploadTime = upload_time(0)
+
+        # Listing the folder cached its children
+        props = __CACHE_BY_PARENT_NAME__.get((remote_id, Name), None)
     else:
         props = get_item(remote_path)
 
         if props:
             Remote_Size = props["Size"]
-            LastUploadTime = datetime.utcfromtimestamp(int(props["LastUploadTime"]) / 1000).replace(tzinfo=tzutc()).astimezone(tzlocal())
+            LastUploadTime = upload_time(props["LastUploadTime"])
         else:
             Remote_Size = 0
-            LastUploadTime = datetime.utcfromtimestamp(0).replace(tzinfo=tzutc()).astimezone(tzlocal())
+            LastUploadTime = upload_time(0)
 
     if verbose > 0:
         print(f"{local_filename}: ")
@@ -659,7 +1110,7 @@ def has_changed(local_filename, remote_path, verbose=0):
 
     # We only have size and upload time available at present
     # TODO: See if we can coax the check_sum we calculated for upload out of Degoo for testing again against the local check_sum.
-    return Size != Remote_Size or LastModificationTime > LastUploadTime
+    return (Size != Remote_Size or LastModificationTime > LastUploadTime, props)
 
 
 def get_file(remote_file, local_directory=None, verbose=0, if_missing=False, dry_run=False, schedule=False):
@@ -676,22 +1127,13 @@ def get_file(remote_file, local_directory=None, verbose=0, if_missing=False, dry
     :returns: the FilePath property of the downloaded remote_file.
     '''
     if schedule:
-        window = SCHEDULE["download"]
-        window_start = time.strptime(window[0], "%H:%M:%S")
-        window_end = time.strptime(window[1], "%H:%M:%S")
-        now = time.localtime()
-
-        in_window = now > min(window_start, window_end) and now < max(window_start, window_end)
-
-        if ((window_start < window_end and not in_window)
-        or  (window_start > window_end and in_window)):
-            wait_until_next(window_start, verbose)
+        wait_for_window("download", verbose)
 
     item = get_item(remote_file)
 
     # If we landed here with a directory rather than remote_file, just redirect
     # to the appropriate downloader.
-    if item["CategoryName"] in api.folder_types:
+    if item["CategoryName"] in FOLDER_TYPES:
         return get_directory(remote_file)
 
     # Try the Optimized URL first I guess
@@ -705,17 +1147,14 @@ def get_file(remote_file, local_directory=None, verbose=0, if_missing=False, dry
     Data = item.get('Data', None)
     Headers = {'User-Agent': api.USER_AGENT}
 
-    # Remember the current working directory
-    cwd = os.getcwd()
-
+    # We download to an explicit dest_file and never chdir, as the working
+    # directory is shared by all threads (see get_directory).
     if local_directory is None:
         dest_file = os.path.join(os.getcwd(), Name)
     elif os.path.isdir(local_directory):
-        os.chdir(local_directory)
         dest_file = os.path.join(local_directory, Name)
     elif not os.path.exists(local_directory):
-        os.makedirs(local_directory)
-        os.chdir(local_directory)
+        os.makedirs(local_directory, exist_ok=True)
         dest_file = os.path.join(local_directory, Name)
     else:
         raise DegooError(f"get_file: '{local_directory}' is not a directory.")
@@ -729,7 +1168,7 @@ def get_file(remote_file, local_directory=None, verbose=0, if_missing=False, dry
 
     if URL and Name:
         if not if_missing or not os.path.exists(dest_file):
-            # We use wget which outputs a progress bar to stdout.
+            # We draw wget's progress bar on stdout (to match put_file).
             # This is the only method that writes to stdout because wget does so we do.
             if verbose > 0:
                 if dry_run:
@@ -739,24 +1178,23 @@ def get_file(remote_file, local_directory=None, verbose=0, if_missing=False, dry
 
             # Note:
             #
-            # This relies on a special version of wget at:
-            #
-            #    https://github.com/bernd-wechner/python3-wget
+            # We stream the download with the module's requests session, which keeps
+            # connections alive so that successive downloads (as in get_directory)
+            # skip the TCP and TLS handshakes. It also follows redirects (like the
+            # 302: Moved Temporarily that wget was once seen to fail on).
             #
-            # which has an upstream PR are:
-            #
-            #    https://github.com/jamiejackherer/python3-wget/pull/4
-            #
-            # wget has a bug and while it has a nice progress bar it renders garbage
-            # for Degoo because the download source fails to set the content-length
-            # header. We know the content length from the Degoo metadata though and so
-            # can specify it manually.
+            # The download source fails to set the content-length header. We know
+            # the content length from the Degoo metadata though and so use that for
+            # the progress bar.
             #
             # The Degoo API also rejects the User-Agent that urllib provides by default
             # and we need to set one it accepts. Anything works in fact just not the one
             # python-urllib uses, which seems to be blacklisted.
 
             if not dry_run:
+                # Progress bars from concurrent downloads would garble one another
+                show_progress = threading.current_thread() is threading.main_thread()
+
                 try:
                     if verbose > 2:
                         print(f"Debugging:")
@@ -765,29 +1203,29 @@ def get_file(remote_file, local_directory=None, verbose=0, if_missing=False, dry
                         print(f"\t{Name=}")
                         print(f"\t{URL=}")
 
-                    wget.download(URL, out=Name, size=Size, headers=Headers)
+                    # Download to a partial file, so an interrupted download isn't
+                    # mistaken for a complete one (by if_missing) later.
+                    part_file = dest_file + ".part"
+
+                    with session.get(URL, headers=Headers, stream=True) as response:
+                        response.raise_for_status()
+
+                        with open(part_file, "wb") as file:
+                            done = 0
+                            for chunk in response.iter_content(DOWNLOAD_CHUNK):
+                                file.write(chunk)
+                                done += len(chunk)
+                                if show_progress:
+                                    wget.callback_progress(done, 1, Size, wget.bar_adaptive)
+
+                    os.replace(part_file, dest_file)
                 except Exception as e:
-                    # I have seen a 302 reported as follows:
-                    #     Exception: 302: Moved Temporarily
-                    #     degoo_get: 302: Moved Temporarily
-                    # Don't know from that the exception type, so addded a report here to catch it if it happens again
-                    # and report the tuype, so we can look up how to handle them. A 302 should be accompanied by a new URL,
-                    # and conceivable just try wget again here with that new URL. Getting that new URL from an exception is
-                    # the challenge, and so here is the frist step, to report the exception type to do some reading on that.
-                    #
-                    # Alas retrying the wget that failed above did not produce a 302, so it's not reliably reproducible,
-                    # But it is a legitimate repsonse and we shoudl handle it properly.
-
-                    print(f"wget Exception of type: {type(e)}")
+                    print(f"Download Exception of type: {type(e)}")
                     print(f"\t{str(e)}")
 
-                # The default wqet progress bar leaves cursor at end of line.
-                # It fails to print a new line. This causing glitchy printing
-                # Easy fixed,
-                print("")
-
-            # Having downloaded the file chdir back to where we started
-            os.chdir(cwd)
+                # The wget progress bar leaves cursor at end of line.
+                if show_progress:
+                    print("")
 
             return item["FilePath"]
         else:
@@ -806,88 +1244,89 @@ def get_file(remote_file, local_directory=None, verbose=0, if_missing=False, dry
         raise DegooError(f"{Path} apparently has no URL to download from.")
 
 
-def get_directory(remote_folder, local_directory=None, verbose=0, if_missing=False, dry_run=False, schedule=False):
+def get_directory(remote_folder, local_directory=None, verbose=0, if_missing=False, dry_run=False, schedule=False, _collected=None):
     '''
     Downloads a Directory and all its contents (recursively).
 
-    :param remote_folder: An int or str or None (for the current working directory)
+    :param remote_folder: An int or str or dict (of properties) or None (for the current working directory)
     :param local_directory: The local directory into which to drop the downloaded folder
     :param verbose:    Print useful tracking/diagnostic information
     :param if_missing: Only download files missing locally (i.e don't overwrite local files)
     :param dry_run:    Don't actually download the file ...
     :param schedule:   Respect the configured schedule (i.e download only when schedule permits)
+    :param _collected: Used internally when recursing, the children of every folder in the tree (see _collect)
     '''
     item = get_item(remote_folder)
 
     # If we landed here with a file rather than folder, just redirect
     # to the approproate downloader.
-    if not item["CategoryName"] in api.folder_types:
+    if not item["CategoryName"] in FOLDER_TYPES:
         return get_file(remote_folder)
 
     dir_id = item['ID']
 
-    # Remember the current working directory
-    cwd = os.getcwd()
-
-    # Choose a local directory and cd there to download the files into it
+    # Choose a local directory to download the files into. We give it, as an
+    # absolute path, to get_file and to the recursion, and never chdir into it,
+    # as the working directory is shared by all threads (downloads run in them).
     if local_directory is None:
         local_directory = item['Name']
-        # Make the target directory if needed
-        try:
-            os.mkdir(local_directory)
-        except FileExistsError:
-            # Not a problem if the local directory already exists
-            pass
-
-        # Step down into the new directory for the downloads
-        os.chdir(local_directory)
+        # Make the target directory if needed (not a problem if it already exists)
+        os.makedirs(local_directory, exist_ok=True)
 
         if verbose > 2:
-            print(f"No local_directory specified: cd {local_directory}")
+            print(f"No local_directory specified: using {local_directory}")
 
     elif os.path.isdir(local_directory):
-        os.chdir(local_directory)
         if verbose > 2:
-            print(f"Specified local_directory exists: cd {local_directory}")
+            print(f"Specified local_directory exists: using {local_directory}")
 
     elif not os.path.exists(local_directory):
         os.makedirs(local_directory)
-        os.chdir(local_directory)
         if verbose > 2:
-            print(f"Specified local_directory was created: cd {local_directory}")
+            print(f"Specified local_directory was created: using {local_directory}")
 
     else:
         raise DegooError(f"get_file: Specified {local_directory=} is not a directory.")
 
-    # Fetch and classify all Degoo drive contents of this remote folder
-    children = get_children(dir_id)
+    local_directory = os.path.abspath(local_directory)
+
+    # Fetch the whole remote tree at the outset, many folders at once,
+    # rather than one folder at a time as we descend into them.
+    if _collected is None:
+        _collected = _collect(dir_id)
 
-    files = [child for child in children if not child["CategoryName"] in api.folder_types]
-    folders = [child for child in children if child["CategoryName"] in api.folder_types]
+    # Classify all Degoo drive contents of this remote folder
+    children = _collected[dir_id]
+
+    files, folders = [], []
+    for child in children:
+        (folders if child["CategoryName"] in FOLDER_TYPES else files).append(child)
 
     # Download files
     if verbose > 1:
         print(f"fetching files from {item['FilePath']}")
 
-    for f in files:
-        try:
-            get_file(f['ID'], None, verbose, if_missing, dry_run, schedule)
+    # Downloads are I/O bound so run a few at once.
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        futures = [executor.submit(get_file, f['ID'], local_directory, verbose, if_missing, dry_run, schedule) for f in files]
 
-        # Don't stop on a DegooError, report it but keep going.
-        except DegooError as e:
-            if verbose > 0:
-                print(e, file=sys.stderr)
+        for future in as_completed(futures):
+            try:
+                future.result()
+
+            # Don't stop on a DegooError, report it but keep going.
+            except DegooError as e:
+                if verbose > 0:
+                    print(e, file=sys.stderr)
 
     # Make the local folders and download into them
     for f in folders:
-        local_directory = os.path.join(os.curdir, f['Name'])
+        sub_directory = os.path.join(local_directory, f['Name'])
         if verbose > 1:
-            print(f"fetching files from {f['FilePath']} to {local_directory}")
+            print(f"fetching files from {f['FilePath']} to {sub_directory}")
 
-        get_directory(f['ID'], local_directory, verbose, if_missing, dry_run, schedule)
-
-    # Having downloaded all the items in this remote folder chdir back to where we started
-    os.chdir(cwd)
+        # Pass the props we already have, sparing get_item a lookup
+        get_directory(f, sub_directory, verbose, if_missing, dry_run, schedule, _collected)
 
 
 def get(remote_path, local_directory=None, verbose=0, if_missing=False, dry_run=False, schedule=False):
@@ -903,13 +1342,51 @@ def get(remote_path, local_directory=None, verbose=0, if_missing=False, dry_run=
     '''
     item = get_item(remote_path)
 
-    if item["CategoryName"] in api.folder_types:
+    if item["CategoryName"] in FOLDER_TYPES:
         return get_directory(item['ID'], local_directory, verbose, if_missing, dry_run, schedule)
     else:
         return get_file(item['ID'], local_directory, verbose, if_missing, dry_run, schedule)
 
 
-def put_file(local_file, remote_folder, verbose=0, if_changed=False, dry_run=False, schedule=False):
+# How much of the start of a file libmagic is shown to identify its type by
+MAGIC_BYTES = 1 << 20
+
+# A libmagic instance loads its whole database of file types, so make one once
+# (it holds a lock around each use, so upload threads can share it).
+_MIME = magic.Magic(mime=True)
+
+# How often (in bytes sent) the upload progress bar is redrawn
+PROGRESS_BYTES = 1 << 18
+
+
+def _scan_file(local_file):
+    '''
+    Reads a local file once for all that an upload needs to know of it.
+
+    The file is memory mapped, hashed in one go, and libmagic is shown the start
+    of the same map, rather than each opening and reading the file for itself.
+
+    :param local_file: The local file (full or relative path)
+
+    :returns: A tuple containing the size, MIME type and Degoo checksum of the file.
+    '''
+    with open(local_file, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file can't be mapped, but nor is there anything to read
+            return (0, _MIME.from_file(local_file), api.check_sum_buffer(b""))
+
+        # The map's length is the file's size, without a stat() to ask
+        with mm:
+            Size = len(mm)
+            MimeType = _MIME.from_buffer(mm[:MAGIC_BYTES])
+            Checksum = api.check_sum_buffer(mm)
+
+    return (Size, MimeType, Checksum)
+
+
+def put_file(local_file, remote_folder, verbose=0, if_changed=False, dry_run=False, schedule=False, entry=None, return_url=True, local_stat=None, force=False):
     '''
     Uploads a local_file to the Degoo cloud store.
 
@@ -919,29 +1396,34 @@ def put_file(local_file, remote_folder, verbose=0, if_changed=False, dry_run=Fal
     :param if_changed:     Only upload the local_file if it's changed
     :param dry_run:        Don't actually upload the local_file ...
     :param schedule:       Respect the configured schedule (i.e upload only when schedule permits)
+    :param entry:          Optionally the os.DirEntry for local_file (its cached stat saves a stat() call)
+    :param return_url:     If False, skip fetching the uploaded file's path and URL (and return None for them)
+    :param local_stat:     Optionally the os.stat_result for local_file if the caller has one already
+    :param force:          Send the local_file even if our record says the same contents are there already
 
     :returns: A tuple containing the Degoo ID, Remote file path and the download URL of the local_file.
     '''
 
+    # Progress bars from concurrent uploads would garble one another
+    show_progress = threading.current_thread() is threading.main_thread()
+    last_shown = 0
+
     def progress(monitor):
         '''
         Uses wget's bar_adaptive to remain in conformance with get_file().
 
+        The monitor calls this for every few KiB read, so we draw the bar only
+        every PROGRESS_BYTES (and at the end) rather than every time.
+
         :param monitor: And instance of MultipartEncoderMonitor
         '''
-        return wget.callback_progress(monitor.bytes_read, 1, monitor.len, wget.bar_adaptive)
+        nonlocal last_shown
+        if show_progress and (monitor.bytes_read - last_shown >= PROGRESS_BYTES or monitor.bytes_read == monitor.len):
+            last_shown = monitor.bytes_read
+            return wget.callback_progress(monitor.bytes_read, 1, monitor.len, wget.bar_adaptive)
 
     if schedule:
-        window = SCHEDULE["upload"]
-        window_start = time.strptime(window[0], "%H:%M:%S")
-        window_end = time.strptime(window[1], "%H:%M:%S")
-        now = time.localtime()
-
-        in_window = now > min(window_start, window_end) and now < max(window_start, window_end)
-
-        if ((window_start < window_end and not in_window)
-        or  (window_start > window_end and in_window)):
-            wait_until_next(window_start, verbose)
+        wait_for_window("upload", verbose)
 
     if verbose > 2:
         print(f"Debugging:")
@@ -957,10 +1439,21 @@ def put_file(local_file, remote_folder, verbose=0, if_changed=False, dry_run=Fal
     if verbose > 1:
         print(f"Asked to upload {local_file} to {dir_path}: {if_changed=} {dry_run=}")
 
+    if entry:
+        filename = entry.name
+        local_stat = entry.stat()
+    else:
+        filename = os.path.basename(local_file)
+        if local_stat is None:
+            local_stat = os.stat(local_file)
+
+    # has_changed hands back the remote file too, if it has it, for reporting an unchanged one
+    changed, remote = has_changed(local_file, remote_folder, verbose - 1, local_stat) if if_changed else (True, None)
+
     # Upload only if:
     #    if_changed is False and dry_run is False (neither is true)
     #    if_changed is True and has_changed is true and dry_run is False
-    if (not if_changed or has_changed(local_file, remote_folder, verbose - 1)):
+    if changed:
         if dry_run:
             if verbose > 0:
                 print(f"Would upload {local_file} to {dir_path}")
@@ -974,7 +1467,23 @@ def put_file(local_file, remote_folder, verbose=0, if_changed=False, dry_run=Fal
             # 3. Call setUploadFile3 to inform Degoo it worked and create the Degoo item that maps to it
             # 4. Call getOverlay4 to fetch the Degoo item this created so we can see that it worked (and return the download URL)
 
-            MimeTypeOfFile = magic.Magic(mime=True).from_file(local_file)
+            # One pass over the file for its size, type and checksum
+            Size, MimeTypeOfFile, Checksum = _scan_file(local_file)
+
+            # If we uploaded these very contents to this folder last time (it's only been
+            # touched say) and they're still there, there's nothing to send. Degoo don't
+            # tell us an item's checksum, so we rely on our record of the last upload.
+            uploaded = None if force else UPLOADS.get(upload_key(local_file, dir_id), None)
+            if uploaded and uploaded[2] == Checksum:
+                get_children(dir_id)
+                remote = __CACHE_BY_PARENT_NAME__.get((dir_id, filename), None)
+
+                if remote and remote["Size"] == Size:
+                    if verbose > 0:
+                        print(f"{local_file}: contents unchanged since last upload, not sending them again")
+
+                    record_upload(local_file, dir_id, local_stat, Checksum)
+                    return (remote["ID"], remote["FilePath"], remote["URL"])
 
             #################################################################
             # # STEP 1: getBucketWriteAuth4
@@ -1002,8 +1511,7 @@ def put_file(local_file, remote_folder, verbose=0, if_changed=False, dry_run=Fal
             # as the KeyPrefix, the next appears to be the local_file extension, and the
             # last an apparent filename that is consctucted as checksum.extension.
             # Odd, to say the least.
-            Type = os.path.splitext(local_file)[1][1:]
-            Checksum = api.check_sum(local_file)
+            Type = os.path.splitext(filename)[1][1:]
 
             if Type:
                 Key = "{}{}/{}.{}".format(KeyPrefix, Type, Checksum, Type)
@@ -1012,9 +1520,6 @@ def put_file(local_file, remote_folder, verbose=0, if_changed=False, dry_run=Fal
                 # This requires a little more testing. It seems to work with any value.
                 Key = "{}{}/{}.{}".format(KeyPrefix, "@", Checksum, "@")
 
-            # We need filesize
-            Size = os.path.getsize(local_file)
-
             # Now upload the local_file
             parts = [
                 ('key', (None, Key)),
@@ -1024,19 +1529,43 @@ def put_file(local_file, remote_folder, verbose=0, if_changed=False, dry_run=Fal
                 ('GoogleAccessId', (None, GoogleAccessId)),
                 ('Cache-control', (None, CacheControl)),
                 ('Content-Type', (None, MimeTypeOfFile)),
-                ('file', (os.path.basename(local_file), open(local_file, 'rb'), MimeTypeOfFile))
             ]
 
             # Perform the upload
-            multipart = MultipartEncoder(fields=dict(parts))
-            monitor = MultipartEncoderMonitor(multipart, progress)
-
-            heads = {"ngsw-bypass": "1", "content-type": multipart.content_type, "content-length": str(multipart.len)}
+            #
+            # MultipartEncoder streams the body, reading the file as it's sent, so
+            # memory use stays small whatever the file size. Don't be tempted to
+            # use requests.post(files=...) instead, it builds the whole body in RAM.
+            #
+            # Degoo's signed policy only permits this one POST of the whole file (not
+            # a resumable upload that could pick up where it left off), so if the
+            # connection drops we start again, with the file reopened from the top.
+            for attempt in range(1, UPLOAD_ATTEMPTS + 1):
+                last_shown = 0
 
-            response = requests.post(BaseURL, data=monitor, headers=heads)
+                try:
+                    # Closed as soon as it's sent, not whenever the encoder is collected,
+                    # so that concurrent uploads don't pile up open files.
+                    with open(local_file, 'rb', buffering=UPLOAD_BLOCK) as file:
+                        multipart = MultipartEncoder(fields=dict(parts + [('file', (filename, file, MimeTypeOfFile))]))
+                        monitor = MultipartEncoderMonitor(multipart, progress)
+
+                        heads = {"ngsw-bypass": "1", "content-type": multipart.content_type, "content-length": str(multipart.len)}
+
+                        # Streamed so that the (normally empty) body is only read if we look at it.
+                        response = session.post(BaseURL, data=monitor, headers=heads, stream=True)
+                    break
+                except requests.exceptions.ConnectionError as e:
+                    if attempt == UPLOAD_ATTEMPTS:
+                        raise DegooError(f"Upload of {local_file} failed {UPLOAD_ATTEMPTS} times, last with: {e}")
+                    elif verbose:
+                        if show_progress:
+                            print()
+                        print(f"Upload of {local_file} was interrupted, trying again.")
 
             # A new line after the progress bar is complete
-            print()
+            if show_progress:
+                print()
 
             # We expect a 204 status result, which is silent acknowledgement of success.
             if response.ok and response.status_code == 204:
@@ -1049,11 +1578,15 @@ def put_file(local_file, remote_folder, verbose=0, if_changed=False, dry_run=Fal
                         print(f"\t{h}: {response.headers[h]}")
                     print("Google Response Content:")
                     if response.content:
-                        print(json.dumps(json.loads(response.content), indent=4))
+                        print(json_dumps(json_loads(response.content), indent=True))
                     else:
                         print("\tNothing, Nil, Nada, Empty")
                     print("")
 
+                # Read the (empty) body, which hands the connection back to the pool
+                # for the next upload. Closing the unread response would close it.
+                response.content
+
 #                 # Empirically the download URL seems fairly predictable from the inputs we have.
 #                 # with two caveats:
 #                 #
@@ -1096,12 +1629,23 @@ def put_file(local_file, remote_folder, verbose=0, if_changed=False, dry_run=Fal
                 #################################################################
                 # # STEP 3: setUploadFile3
 
-                degoo_id = api.setUploadFile3(os.path.basename(local_file), dir_id, Size, Checksum)
+                degoo_id = api.setUploadFile3(filename, dir_id, Size, Checksum)
+
+                record_upload(local_file, dir_id, local_stat, Checksum)
+
+                # The folder's cached contents lack (or have an outdated) copy of the file
+                __CACHE_CONTENTS__.pop(dir_id, None)
+
+                # Callers that don't want the path and URL can be spared another round trip
+                if not return_url:
+                    return (degoo_id, None, None)
 
                 #################################################################
                 # # STEP 4: getOverlay4
 
+                # Fetched afresh (a cached copy would predate this upload) and cached
                 props = api.getOverlay4(degoo_id)
+                cache_item(degoo_id, props)
 
                 Path = props['FilePath']
                 URL = props['URL']
@@ -1115,24 +1659,26 @@ def put_file(local_file, remote_folder, verbose=0, if_changed=False, dry_run=Fal
 
                 return (degoo_id, Path, URL)
             else:
-                raise DegooError(f"Upload failed with: Failed with: {response}")
+                raise DegooError(f"Upload failed with: Failed with: {response} {response.text}")
     else:
         if dry_run and verbose:
             print(f"Would NOT upload {local_file} to {dir_path} as it has not changed since last upload.")
 
-        children = get_children(dir_id)
-        props = {child['Name']: child for child in children}
+        if remote is None:
+            get_children(dir_id)
+            remote = __CACHE_BY_PARENT_NAME__.get((dir_id, filename), None)
 
-        filename = os.path.basename(local_file)
-        if filename in props:
-            ID = props[filename]['ID']
-            Path = props[filename]['FilePath']
-            URL = props[filename]['URL']
+        ID = Path = URL = None
+
+        if remote:
+            ID = remote['ID']
+            Path = remote['FilePath']
+            URL = remote['URL']
 
         return (ID, Path, URL)
 
 
-def put_directory(local_directory, remote_folder, verbose=0, if_changed=False, dry_run=False, schedule=False):
+def put_directory(local_directory, remote_folder, verbose=0, if_changed=False, dry_run=False, schedule=False, jobs=None, force=False):
     '''
     Uploads a local directory recursively to the Degoo cloud store.
 
@@ -1142,41 +1688,87 @@ def put_directory(local_directory, remote_folder, verbose=0, if_changed=False, d
     :param if_changed: Uploads only files changed since last upload
     :param dry_run: Don't actually upload anything ...
     :param schedule:   Respect the configured schedule (i.e upload only when schedule permits)
+    :param jobs:       The number of files to upload at once (UPLOAD_WORKERS if None)
+    :param force:      Send every file, even those our record says are there already
 
     :returns: A tuple containing the Degoo ID and the Remote file path
     '''
     IDs = {}
 
     target_dir = get_dir(remote_folder)
-    (target_junk, target_name) = os.path.split(local_directory)
+    (target_junk, target_name) = os.path.split(local_directory)  # @UnusedVariable
 
     Root = target_name
     IDs[Root] = mkdir(target_name, target_dir['ID'], verbose - 1, dry_run)
 
-    for root, dirs, files in os.walk(local_directory):
-        # if local directory contains a head that is included in root then we don't want
-        # it when we're making dirs on the remote (cloud) drive and remembering the
-        # IDs of those dirs.
-        if target_junk:
-            relative_root = root.replace(target_junk + os.sep, "", 1)
-        else:
-            relative_root = root
-
-        for name in dirs:
-            Name = os.path.join(root, name)
+    def put_tree(directory, dir_id, executor, futures):
+        '''
+        Uploads the contents of a local directory to the Degoo folder dir_id, recursively.
 
-            IDs[Name] = mkdir(name, IDs[relative_root], verbose - 1, dry_run)
+        Uses os.scandir, the DirEntry objects it yields cache the stat() results that
+        put_file needs, which saves a few stat() calls per file over os.walk.
 
-        for name in files:
-            Name = os.path.join(root, name)
+        Folders are made here, as their children need their IDs, but the files
+        are submitted to the executor to upload concurrently.
 
-            put_file(Name, IDs[relative_root], verbose, if_changed, dry_run, schedule)
+        :param directory: The local directory to upload the contents of
+        :param dir_id:    The Degoo ID of the folder to upload them into
+        :param executor:  The ThreadPoolExecutor to upload the files with
+        :param futures:   A list to add the Future of each file's upload to
+        '''
+        # Sorted into folders and files in one pass. The DirEntry paths come ready
+        # made, built in C by scandir, so no joining of path strings is needed.
+        dirs = []
+        files = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir():
+                    dirs.append(entry)
+                elif entry.is_file():
+                    files.append(entry)
+
+        # Make all the subdirectories with one call to Degoo, not one each
+        dir_ids = mkdirs([entry.name for entry in dirs], dir_id, verbose - 1, dry_run) if dirs else {}
+
+        # Check which files have changed before uploading any of them. Each upload
+        # drops the folder's cached contents, and checking the files as they're
+        # uploaded would fetch those contents again for every file.
+        if if_changed and dir_id:
+            changed = []
+            for entry in files:
+                if has_changed(entry.path, dir_id, verbose - 1, entry.stat())[0]:
+                    changed.append(entry)
+                elif dry_run and verbose:
+                    print(f"Would NOT upload {entry.path} as it has not changed since last upload.")
+            files = changed
+
+        for entry in files:
+            futures.append(executor.submit(put_file, entry.path, dir_id, verbose, False, dry_run, schedule, entry=entry, return_url=False, force=force))
+
+        # Like os.walk, don't follow symbolic links to directories
+        for entry in dirs:
+            if not entry.is_symlink():
+                put_tree(entry.path, dir_ids[entry.name], executor, futures)
+
+    # Uploads are I/O bound so run a few at once, while we walk the tree.
+    with ThreadPoolExecutor(max_workers=jobs or UPLOAD_WORKERS) as executor:
+        futures = []
+        put_tree(local_directory, IDs[Root], executor, futures)
+
+        for future in as_completed(futures):
+            try:
+                future.result()
+
+            # Don't stop on a DegooError, report it but keep going.
+            except DegooError as e:
+                if verbose > 0:
+                    print(e, file=sys.stderr)
 
     # Directories have no download URL, they exist only as Degoo metadata
     return (IDs[Root], target_dir["Path"])
 
 
-def put(local_path, remote_folder, verbose=0, if_changed=False, dry_run=False, schedule=False):
+def put(local_path, remote_folder, verbose=0, if_changed=False, dry_run=False, schedule=False, jobs=None, force=False):
     '''
     Uplads a file or folder to the Degoo cloud store
 
@@ -1185,14 +1777,19 @@ def put(local_path, remote_folder, verbose=0, if_changed=False, dry_run=False, s
     :param verbose: Print useful tracking/diagnostic information
     :param if_changed: Uploads only files changed since last upload
     :param schedule:   Respect the configured schedule (i.e upload only when schedule permits)
+    :param jobs:       The number of files to upload at once from a folder (UPLOAD_WORKERS if None)
+    :param force:      Send the file(s) even if our record says they are there already
     '''
-    isFile = os.path.isfile(local_path)
-    isDirectory = os.path.isdir(local_path)
+    # One stat() answers both questions (and raises FileNotFoundError if there's nothing there)
+    local_stat = os.stat(local_path)
+    isFile = stat.S_ISREG(local_stat.st_mode)
+    isDirectory = stat.S_ISDIR(local_stat.st_mode)
 
     if isDirectory:
-        return put_directory(local_path, remote_folder, verbose, if_changed, dry_run, schedule)
+        return put_directory(local_path, remote_folder, verbose, if_changed, dry_run, schedule, jobs, force)
     elif isFile:
-        return put_file(local_path, remote_folder, verbose, if_changed, dry_run, schedule)
+        # And put_file needn't stat() it again
+        return put_file(local_path, remote_folder, verbose, if_changed, dry_run, schedule, local_stat=local_stat, force=force)
     else:
         return None
 
@@ -1203,46 +1800,80 @@ def put(local_path, remote_folder, verbose=0, if_changed=False, dry_run=False, s
 # (excepting error messages to stderr and verbose output to stdout)
 
 
-def ls(directory=None, long=False, human=False, recursive=False):
+def ls(directory=None, long=False, human=False, recursive=False, _collected=None):
+    # Collect the listing and print it in one go, rather than line by line
+    lines = []
+
     if recursive:
         props = get_item(directory)
-        print(f"{props['FilePath']}:")
+        lines.append(f"{props['FilePath']}:")
 
-    items = get_children(directory)
+        # Fetch the whole remote tree at the outset, many folders at once,
+        # rather than one folder at a time as we descend into them.
+        if _collected is None:
+            _collected = _collect(props["ID"])
 
-    for i in items:
-        if long:
-            times = f"c:{i['Time_Created']}\tm:{i['Time_LastModified']}\tu:{i['Time_LastUpload']}"
-            size = f"{humanfriendly.format_size(i['Size']):>{api.SIZELEN}s}" if human else f"{i['Size']:{api.SIZELEN}d}"
-            print(f"{i['ID']}\t{i['CategoryName']:{api.CATLEN}s}\t{i['Name']:{api.NAMELEN}s}\t{size}\t{times}")
-        else:
-            print(f"{i['Name']}")
+        items = _collected[props["ID"]]
+    else:
+        items = get_children(directory)
+
+    if long:
+        # The items may have come from the cache rather than a fresh fetch
+        # that set api.NAMELEN, so size the Name field to fit them here.
+        namelen = max([len(i['Name']) for i in items], default=api.NAMELEN)
+
+        # The field widths are fixed for the whole listing, so build the formats once
+        row = f"{{}}\t{{:{api.CATLEN}s}}\t{{:{namelen}s}}\t{{}}\tc:{{}}\tm:{{}}\tu:{{}}"
+        size = f"{{:>{api.SIZELEN}s}}" if human else f"{{:{api.SIZELEN}d}}"
+
+        for i in items:
+            Size = humanfriendly.format_size(i['Size']) if human else i['Size']
+            lines.append(row.format(i['ID'], i['CategoryName'], i['Name'], size.format(Size), i['Time_Created'], i['Time_LastModified'], i['Time_LastUpload']))
+    else:
+        lines.extend(i['Name'] for i in items)
+
+    if recursive:
+        lines.append('')
+
+    if lines:
+        print("\n".join(lines))
 
     if recursive:
-        print('')
         for i in items:
-            if i['CategoryName'] in api.folder_types:
-                ls(i['ID'], long, human, recursive)
+            if i['CategoryName'] in FOLDER_TYPES:
+                ls(i['ID'], long, human, recursive, _collected)
 
 
-def tree(dir_id=0, show_times=False, _done=[]):
+def tree(dir_id=0, show_times=False):
     T = "├── "
     I = "│   "
     L = "└── "
     E = "    "
 
-    # Print name of the root item in the tree
-    if not _done:
-        props = get_item(dir_id)
-        name = props.get("FilePath", "")
-        print(name)
+    # Collect the tree's lines and print them in one go, rather than line by line,
+    # starting with the name of the root item in the tree
+    props = get_item(dir_id)
+    name = props.get("FilePath", "")
+    lines = [name]
+
+    # Fetch the whole tree first, many folders at once, then print it
+    children = _collect(props["ID"])
+
+    # Walk the tree with an explicit stack of (kids, index of next kid, prefix)
+    # so that each level's prefix is built once, by extending its parent's,
+    # rather than rebuilt from scratch for every line printed.
+    stack = [(children[props["ID"]], 0, "")]
+
+    while stack:
+        kids, k, prefix = stack.pop()
+
+        if k < len(kids):
+            kid = kids[k]
+            is_last = k == len(kids) - 1
 
-    kids = get_children(dir_id)
+            # Come back for the next sibling after this kid's subtree
+            stack.append((kids, k + 1, prefix))
 
-    if kids:
-        last_id = kids[-1]['ID']
-        for kid in kids:
-            ID = kid['ID']
             name = kid.get("Name", "")
             cat = kid.get("CategoryName", kid.get("Category", None))
 
@@ -1250,15 +1881,12 @@ def tree(dir_id=0, show_times=False, _done=[]):
             if show_times:
                 postfix = f" (c:{kid['Time_Created']}, m:{kid['Time_LastModified']}, u:{kid['Time_LastUpload']})"
 
-            prefix = "".join([E if d else I for d in _done])
-            prefix = prefix + (L if ID == last_id else T)
+            lines.append(prefix + (L if is_last else T) + name + postfix)
 
-            print(prefix + name + postfix)
+            if cat in FOLDER_TYPES:
+                stack.append((children[kid['ID']], 0, prefix + (E if is_last else I)))
 
-            if cat in api.folder_types:
-                new_done = _done.copy()
-                new_done.append(ID == last_id)
-                tree(ID, show_times, new_done)
+    print("\n".join(lines))
 
 ###########################################################################
 # A Test hook